@@ -1,5 +1,41 @@
 import numpy as np
-import pandas as pd
+
+# Bitmask with a bit set for every digit (bit k means digit k + 1)
+ALL_DIGITS = 0x1FF
+
+# Maps a digit to its bit, an empty cell (0) maps to no bit at all
+DIGIT_BITS = np.array([0] + [1 << k for k in range(9)], dtype=np.uint16)
+
+# Maps a filled cell to all bits, so that no numbers remain possible there, an empty cell (0) maps to no bit at all
+FILLED_BITS = np.array([0] + [ALL_DIGITS] * 9, dtype=np.uint16)
+
+# Maps a bitmask to the amount of numbers it contains
+BIT_COUNT = np.array([bin(mask).count('1') for mask in range(ALL_DIGITS + 1)], dtype=np.int8)
+
+# Maps a filled cell to more than the maximum amount of options, so that searching the fewest options skips it
+FILLED_COUNT = np.array([0] + [10] * 9, dtype=np.int8)
+
+# Maps a bitmask with a single bit to the number it represents
+MASK_DIGIT = np.array([mask.bit_length() for mask in range(ALL_DIGITS + 1)], dtype=np.int8)
+
+# Maps a row coordinate (i, j) to the group it belongs to
+BOX_ID = np.array([[(i // 3) * 3 + j // 3 for j in range(9)] for i in range(9)])
+
+# Maps a flat cell index (i * 9 + j) to its row, column and group, to look up a batch of cells at once
+CELL_ROW, CELL_COL, CELL_BOX = np.array([(i, j, (i // 3) * 3 + j // 3) for i in range(9) for j in range(9)]).transpose()
+
+# The flat cell indices of every row, column and group (in that order), one unit of nine cells per row
+UNITS = np.concatenate((
+    np.arange(81).reshape(9, 9),
+    np.arange(81).reshape(9, 9).transpose(),
+    np.arange(81).reshape(3, 3, 3, 3).transpose(0, 2, 1, 3).reshape(9, 9),
+))
+
+# Maps a flat cell index to the indices in UNITS of its row, column and group
+CELL_UNITS = np.array([(i, 9 + j, 18 + (i // 3) * 3 + j // 3) for i in range(9) for j in range(9)])
+
+# The shift of the bit of every digit, used to split a bitmask into one flag per digit
+DIGIT_SHIFTS = np.arange(9, dtype=np.uint16)
 
 
 def group_coordinate_to_row_coordinate(group: int, i: int) -> tuple[int, int]:
@@ -12,6 +48,197 @@ def group_coordinate_to_row_coordinate(group: int, i: int) -> tuple[int, int]:
     return i // 3 + (group - (group % 3)), i % 3 + 3 * (group % 3)
 
 
+def used_masks(field: np.ndarray) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Computes which numbers are already used in each row, column and group of a sudoku.
+    :param field: A two-dimensional array containing a sudoku representation.
+    :return:      Three uint16 arrays of length 9 (rows, columns, groups), containing a bitmask of the used numbers.
+    """
+    bits = DIGIT_BITS[field]
+    row_mask = np.bitwise_or.reduce(bits, axis=1)
+    col_mask = np.bitwise_or.reduce(bits, axis=0)
+    box_mask = np.bitwise_or.reduce(bits.reshape(3, 3, 3, 3), axis=(1, 3)).reshape(9)
+    return row_mask, col_mask, box_mask
+
+
+def possible_options(field: np.ndarray, row_mask: np.ndarray, col_mask: np.ndarray, box_mask: np.ndarray) -> np.ndarray:
+    """
+    Computes for each position of a sudoku which numbers can still be placed there, given the used numbers.
+    :param field:    A two-dimensional array containing a sudoku representation.
+    :param row_mask: The bitmask of used numbers per row.
+    :param col_mask: The bitmask of used numbers per column.
+    :param box_mask: The bitmask of used numbers per group.
+    :return:         A two-dimensional uint16 array with a bitmask per position, zero for positions that are filled.
+    """
+    options = row_mask[:, None] | col_mask[None, :]
+    options |= box_mask[BOX_ID]
+    options |= FILLED_BITS[field]
+    options ^= ALL_DIGITS
+    return options
+
+
+def _place_cells(field: np.ndarray, row_mask: np.ndarray, col_mask: np.ndarray, box_mask: np.ndarray,
+                 cells: np.ndarray, bits: np.ndarray, trail: list = None):
+    """
+    Places numbers on empty positions and marks them as used in the corresponding rows, columns and groups.
+    :param field:    A two-dimensional array containing a sudoku representation, which is filled in place.
+    :param row_mask: The bitmask of used numbers per row, which is updated in place.
+    :param col_mask: The bitmask of used numbers per column, which is updated in place.
+    :param box_mask: The bitmask of used numbers per group, which is updated in place.
+    :param cells:    The flat indices (i * 9 + j) of the positions.
+    :param bits:     The bit of the number to place on each position.
+    :param trail:    An undo log to which the placements are appended, so they can be reverted with _undo_cells.
+    """
+    rows, cols, boxes = CELL_ROW[cells], CELL_COL[cells], CELL_BOX[cells]
+    field[rows, cols] = MASK_DIGIT[bits]
+    np.bitwise_or.at(row_mask, rows, bits)
+    np.bitwise_or.at(col_mask, cols, bits)
+    np.bitwise_or.at(box_mask, boxes, bits)
+    if trail is not None:
+        trail.append((rows, cols, boxes, bits))
+
+
+def _undo_cells(field: np.ndarray, row_mask: np.ndarray, col_mask: np.ndarray, box_mask: np.ndarray,
+                trail: list, mark: int):
+    """
+    Reverts the placements in the undo log, from the most recent one back till the log has the given length again.
+
+    Placed numbers were never used in their row, column or group before, so clearing their bits restores the masks.
+    :param field:    A two-dimensional array containing a sudoku representation, which is emptied in place.
+    :param row_mask: The bitmask of used numbers per row, which is updated in place.
+    :param col_mask: The bitmask of used numbers per column, which is updated in place.
+    :param box_mask: The bitmask of used numbers per group, which is updated in place.
+    :param trail:    The undo log that _place_cells appended to.
+    :param mark:     The length of the undo log to revert to.
+    """
+    while len(trail) > mark:
+        rows, cols, boxes, bits = trail.pop()
+        field[rows, cols] = 0
+        np.bitwise_and.at(row_mask, rows, ALL_DIGITS ^ bits)
+        np.bitwise_and.at(col_mask, cols, ALL_DIGITS ^ bits)
+        np.bitwise_and.at(box_mask, boxes, ALL_DIGITS ^ bits)
+
+
+def _propagate(field: np.ndarray, row_mask: np.ndarray, col_mask: np.ndarray, box_mask: np.ndarray,
+               trail: list = None, dirty: np.ndarray = None) -> bool:
+    """
+    Fills in every number that can be logically deduced, till nothing more can be deduced.
+
+    Each pass fills in all naked singles (a cell with only a single possible number) and hidden singles (a number that
+    only fits in a single cell of a row, column or group) at once. When neither exist, naked pairs (two cells in a unit
+    with the same two possible numbers) are used to rule out those numbers in the rest of the unit.
+
+    Hidden singles and naked pairs are only searched for in a worklist of dirty units. A unit is cleared once it has
+    been examined, and only becomes dirty again when the options of one of its cells change. The naked pair step keeps
+    its own set of pending units, as it only runs once no more singles are found.
+    :param field:    A two-dimensional array containing a sudoku representation, which is filled in place.
+    :param row_mask: The bitmask of used numbers per row, which is updated in place.
+    :param col_mask: The bitmask of used numbers per column, which is updated in place.
+    :param box_mask: The bitmask of used numbers per group, which is updated in place.
+    :param trail:    An undo log to which every placement is appended, so they can be reverted with _undo_cells.
+    :param dirty:    A boolean mask over UNITS of the units to examine first, defaults to all units.
+    :return:         False if the sudoku turned out to contain a contradiction, otherwise True.
+    """
+    excluded = np.zeros(81, dtype=np.uint16)  # Numbers ruled out by naked pairs
+    dirty = np.ones(len(UNITS), dtype=bool) if dirty is None else dirty.copy()
+    pending = dirty.copy()  # Units that still have to be examined for naked pairs
+    previous = None
+    while True:
+        # Two equal numbers in the same unit only set a single bit in the unit's mask, so then the masks contain fewer
+        # bits than the three units of every filled cell add up to. This covers both the given field and placements
+        masks = np.concatenate((row_mask, col_mask, box_mask))
+        if BIT_COUNT[masks].sum() != 3 * np.count_nonzero(field):
+            return False
+
+        empty = field.ravel() == 0
+        options = possible_options(field, row_mask, col_mask, box_mask).ravel() & ~excluded
+        if (empty & (options == 0)).any():
+            return False
+
+        if previous is not None:
+            dirty[CELL_UNITS[(options != previous).nonzero()[0]]] = True
+            pending |= dirty
+        previous = options
+
+        # Per unit, in how many cells each number still fits. A number that is missing but fits nowhere can't be placed
+        units = UNITS[dirty]
+        unit_options = options[units]
+        fits = (unit_options[:, :, None] >> DIGIT_SHIFTS) & 1
+        counts = fits.sum(axis=1)
+        missing = (~np.concatenate((row_mask, col_mask, box_mask))[dirty, None] >> DIGIT_SHIFTS) & 1
+        if ((counts == 0) & (missing == 1)).any():
+            return False
+        dirty[:] = False
+
+        placements = np.where(options & (options - 1) == 0, options, 0)
+        hidden, digits = (counts == 1).nonzero()
+        cells = units[hidden, fits[hidden, :, digits].argmax(axis=1)]
+        np.bitwise_or.at(placements, cells, DIGIT_BITS[digits + 1])
+
+        if placements.any():
+            if (placements & (placements - 1) != 0).any():
+                return False  # A cell is the only spot for two different numbers
+
+            cells = placements.nonzero()[0]
+            _place_cells(field, row_mask, col_mask, box_mask, cells, placements[cells], trail)
+            continue
+
+        # Rule out the numbers of a naked pair from all other cells in the unit
+        units = UNITS[pending]
+        unit_options = options[units]
+        pending[:] = False
+        pairs = BIT_COUNT[unit_options] == 2
+        twins = ((unit_options[:, :, None] == unit_options[:, None, :]) & pairs[:, :, None]).sum(axis=2) == 2
+        pair_bits = np.bitwise_or.reduce(np.where(twins, unit_options, 0), axis=1)[:, None]
+        ruled_out = np.zeros(81, dtype=np.uint16)
+        np.bitwise_or.at(ruled_out, units, np.where(twins, pair_bits & ~unit_options, pair_bits))
+        ruled_out &= options
+        if not ruled_out.any():
+            return True
+        excluded |= ruled_out
+
+
+def _solve_recursive(field: np.ndarray, row_mask: np.ndarray, col_mask: np.ndarray, box_mask: np.ndarray,
+                     trail: list) -> bool:
+    """
+    Solves a sudoku in place by backtracking over the empty cell with the fewest possible numbers.
+
+    Each guess and everything that follows from it is placed directly in the field and masks and logged in the undo
+    log, so it can be reverted when it doesn't lead to a solution. So when no solution exists, the field and masks are
+    left exactly as they were given.
+    :param field:    A two-dimensional array containing a sudoku representation, which is filled in place.
+    :param row_mask: The bitmask of used numbers per row, which is updated in place.
+    :param col_mask: The bitmask of used numbers per column, which is updated in place.
+    :param box_mask: The bitmask of used numbers per group, which is updated in place.
+    :param trail:    The undo log of all placements made while solving.
+    :return:         True if the sudoku got solved, otherwise False.
+    """
+    # Every placement keeps the masks consistent, so the sudoku is solved once every row uses all numbers
+    if np.bitwise_and.reduce(row_mask) == ALL_DIGITS:
+        return True
+
+    # Pick the empty cell with the fewest options, if it has none this branch can never be solved
+    options = possible_options(field, row_mask, col_mask, box_mask).ravel()
+    cell = (BIT_COUNT[options] + FILLED_COUNT[field.ravel()]).argmin()
+
+    # A guess only changes the options within the row, column and group of the cell
+    dirty = np.zeros(len(UNITS), dtype=bool)
+    dirty[CELL_UNITS[cell]] = True
+
+    mark = len(trail)
+    for digit in range(1, 10):
+        if not options[cell] & DIGIT_BITS[digit]:
+            continue
+        _place_cells(field, row_mask, col_mask, box_mask, np.array([cell]), DIGIT_BITS[digit:digit + 1], trail)
+
+        # Fill in what follows from the guess, so a contradiction is found before guessing any further
+        if _propagate(field, row_mask, col_mask, box_mask, trail, dirty) and \
+                _solve_recursive(field, row_mask, col_mask, box_mask, trail):
+            return True
+        _undo_cells(field, row_mask, col_mask, box_mask, trail, mark)
+    return False
+
+
 class Sudoku(object):
 
     def __init__(self, field=None, filename=None):
@@ -22,17 +249,20 @@ class Sudoku(object):
         The input of a sudoku is excepted as [[0, 1, 3, 0, 0, 0, 0, 8, 7], [...], [...]], when given as an array. If a
         filename is provided, the rows correspond with a single line and each number is separated by a space.
 
-        :param field:    A two-dimensional array containing a sudoku representation.
+        :param field:    A two-dimensional array containing a sudoku representation, which is copied (as int8).
         :param filename: A filepath to a sudoku representation.
         """
         if field is not None:
-            self.field = field
+            self.field = np.array(field, dtype=np.int8)
         elif filename is not None:
-            df = pd.read_csv(filename, header=None, sep=' ')
-            self.field = np.array(df)
+            self.field = np.loadtxt(filename, dtype=np.int8)
         else:
             raise RuntimeError('Either a field or filename is required in order to construct a Sudoku object.')
 
+        # The numbers used per row, column and group. As the field can also be written to directly, these are rebuilt
+        # from the field whenever solving starts, and only kept up to date by the solver's own writes from there on
+        self._row_used, self._col_used, self._box_used = used_masks(self.field)
+
     @property
     def rows(self):
         """
@@ -52,13 +282,7 @@ class Sudoku(object):
         """
         Get the groups of the sudoku.
         """
-        groups = np.zeros((9, 9))
-        for i in range(3):
-            for j in range(3):
-                for k in range(3):
-                    for l in range(3):
-                        groups[j + 3 * k][i + 3 * l] = self.field[3 * k + l][i + 3 * j]
-        return groups
+        return self.field.reshape(3, 3, 3, 3).transpose(0, 2, 1, 3).reshape(9, 9)
 
     @property
     def valid(self) -> bool:
@@ -67,13 +291,10 @@ class Sudoku(object):
 
         :return: True if the sudoku didn't violate any rules, otherwise False.
         """
-        numbers = set(i for i in range(1, 10))
-        for rows in [self.rows, self.columns, self.groups]:
-            for row in rows:
-                zeros = len(row) - np.count_nonzero(row)
-                if len(numbers - set(row)) != zeros:
-                    return False
-        return True
+        # A row, column or group is valid if none of its numbers occur twice, i.e. each number adds a new bit
+        lines = DIGIT_BITS[np.concatenate((self.rows, self.columns, self.groups))]
+        masks = np.bitwise_or.reduce(lines, axis=1)
+        return np.array_equal(BIT_COUNT[masks], np.count_nonzero(lines, axis=1))
 
     @property
     def filled(self) -> bool:
@@ -84,71 +305,34 @@ class Sudoku(object):
         """
         return np.count_nonzero(self.field) == self.field.size
 
-    def get_possible_values(self):
+    def get_possible_values(self) -> np.ndarray:
         """
         Retrieves for each index the possible numbers that can still fit according to the rules.
-        :return: A two-dimensional array that contains a set for each position, with the numbers that can still fit.
-        """
-        numbers = set(i for i in range(1, 10))
-        possible_values = [[numbers for _ in range(9)] for _ in range(9)]
-
-        rows = self.rows
-        for i in range(9):
-            missing_numbers = numbers - set(rows[i])
-            for j in range(9):
-                if rows[i][j] == 0:
-                    possible_values[i][j] = possible_values[i][j].intersection(missing_numbers)
-                else:
-                    possible_values[i][j] = set()  # Already filled, so no need to store numbers
-
-        cols = self.columns
-        for i in range(9):
-            missing_numbers = numbers - set(cols[i])
-            if len(missing_numbers) > 0:
-                for j in range(9):
-                    if cols[i][j] == 0:
-                        possible_values[j][i] = possible_values[j][i].intersection(missing_numbers)
-
-        groups = self.groups
-        for i in range(9):
-            missing_numbers = numbers - set(groups[i])
-            if len(missing_numbers) > 0:
-                for j in range(9):
-                    if groups[i][j] == 0:
-                        i2, j2 = group_coordinate_to_row_coordinate(i, j)
-                        possible_values[i2][j2] = possible_values[i2][j2].intersection(missing_numbers)
-
-        return possible_values
-
-    def solve_single_position(self):
-        """
-        Attempts to solve a sudoku in a naive way.
-
-        Checks for each cell the possible entries, if only one entry is possible fill it.
-        Once it cannot find any more solutions the function is finished.
-
-        This function can end in two ways:
+
+        The numbers are stored as a bitmask, where bit k is set if the number k + 1 can still be placed. Positions that
+        are already filled have no possible numbers.
+
+        :return: A two-dimensional uint16 array that contains a bitmask for each position.
+        """
+        return possible_options(self.field, *used_masks(self.field))
+
+    def solve_single_position(self) -> bool:
+        """
+        Attempts to solve a sudoku without guessing.
+
+        Checks for each cell the possible entries, if only one entry is possible fill it. The same goes for a number
+        that only fits in a single cell of a row, column or group. Once it cannot find any more solutions the function
+        is finished.
+
+        This function can end in three ways:
         1. The sudoku is solved.
         2. There are only cells left with more than 1 valid entry.
+        3. The sudoku turned out to contain a contradiction, so it can't be solved.
+
+        :return: False if the sudoku can't be solved, otherwise True.
         """
-        old_fields = None
-        while old_fields is None or not np.array_equal(old_fields, self.field):
-            old_fields = np.copy(self.field)
-
-            # Infer all possible options in empty locations
-            possible_values = self.get_possible_values()
-
-            # If a location has a single option, fill it
-            values_added = 0
-            shortest_length = 10
-            for i in range(9):
-                for j in range(9):
-                    length = len(possible_values[i][j])
-                    if length == 1 and self.field[i][j] == 0:
-                        self.field[i][j] = possible_values[i][j].pop()
-                        values_added += 1
-                    if length < shortest_length:
-                        shortest_length = length
+        self._row_used, self._col_used, self._box_used = used_masks(self.field)
+        return _propagate(self.field, self._row_used, self._col_used, self._box_used)
 
     def solve(self):
         """
@@ -157,42 +341,36 @@ class Sudoku(object):
         First we fill all the values that can immediately be filled in, by just checking that only one value is valid
         on a given index. Next we start guessing possible options till we have reached a fully filled and valid sudoku.
         """
-        self.solve_single_position()
-        if not self.filled:
-
-            # Find the shortest possible option
-            possible_values = self.get_possible_values()
-
-            min_possible_options = min(min((len(possible_values[i][j]) for j in range(9) if len(possible_values[i][j]) > 0), default=20) for i in range(9))
-            if min_possible_options == 20:
-                return
-
-            # Search for the shortest option
-            x = None
-            y = None
-            for i in range(9):
-                for j in range(9):
-                    length = len(possible_values[i][j])
-                    if length == min_possible_options:
-                        x = i
-                        y = j
-                        break
-                if x is not None:
-                    break
-
-            # Try to solve the sudoku for each possible option
-            for i in range(min_possible_options):
-                sudoku_copy = Sudoku(np.copy(self.field))
-                sudoku_copy.field[x][y] = possible_values[x][y].pop()
-                sudoku_copy.solve()
-                if sudoku_copy.filled and sudoku_copy.valid:
-                    self.field = sudoku_copy.field
-                    return
+        if self.solve_single_position():
+            _solve_recursive(self.field, self._row_used, self._col_used, self._box_used, [])
 
     def __str__(self):
-        str = ''
-        for row in self.field:
-            for val in row:
-                str += f'{val:2.0f} '
-            str += '\r\n'
-        return str
\ No newline at end of file
+        return ''.join(''.join(f'{val:2d} ' for val in row) + '\r\n' for row in self.field)
+
+
+def _solve_field(field: np.ndarray) -> np.ndarray:
+    """
+    Solves a single sudoku, used as the work item of solve_many.
+    :param field: A two-dimensional array containing a sudoku representation.
+    :return:      The field after solving it.
+    """
+    sudoku = Sudoku(field)
+    sudoku.solve()
+    return sudoku.field
+
+
+def solve_many(fields, processes: int = None) -> np.ndarray:
+    """
+    Solves a batch of sudokus in parallel, divided over a pool of worker processes.
+
+    Like Sudoku.solve, a sudoku that can't be solved is returned as far as it got filled in. On platforms that start
+    processes by spawning (Windows, macOS), this has to be called from within an `if __name__ == '__main__'` block.
+
+    :param fields:    A three-dimensional array (or list) containing a sudoku representation per entry.
+    :param processes: The number of worker processes, defaults to the number of CPUs.
+    :return:          A three-dimensional int8 array containing the solved field per entry.
+    """
+    from multiprocessing import Pool  # Only imported when needed, as it adds noticeably to the import time
+
+    with Pool(processes) as pool:
+        return np.array(pool.map(_solve_field, fields), dtype=np.int8).reshape(-1, 9, 9)
@@ -1,8 +1,11 @@
+import os
 import unittest
 
 import numpy as np
 
-from solver import Sudoku, group_coordinate_to_row_coordinate
+from solver import Sudoku, group_coordinate_to_row_coordinate, solve_many, used_masks
+
+SUDOKU_DIR = os.path.join(os.path.dirname(__file__), 'sudokus')
 
 
 class TestStaticFunctions(unittest.TestCase):
@@ -56,6 +59,13 @@ class TestSudoku(unittest.TestCase):
         sudoku = Sudoku(self.INIT_FIELD_COLUMNS)
         np.testing.assert_array_equal(sudoku.field, sudoku.rows)
 
+    def test_field_is_copied(self):
+        for dtype in [np.int8, np.int64]:
+            field = self.INIT_FIELD.astype(dtype)
+            sudoku = Sudoku(field)
+            sudoku.solve()
+            np.testing.assert_array_equal(self.INIT_FIELD, field)
+
     def test_columns(self):
         sudoku = Sudoku(self.INIT_FIELD)
         np.testing.assert_array_equal(self.INIT_FIELD_COLUMNS, sudoku.columns)
@@ -73,9 +83,99 @@ class TestSudoku(unittest.TestCase):
         sudoku = Sudoku(self.INIT_FIELD_COLUMNS)
         self.assertTrue(sudoku.valid)
 
+    def test_valid_after_direct_write(self):
+        sudoku = Sudoku(np.copy(self.INIT_FIELD))
+        self.assertTrue(sudoku.valid)
+        sudoku.field[0][3] = 2  # Duplicate in the second group only
+        self.assertFalse(sudoku.valid)
+
+    def test_invalid(self):
+        field = np.copy(self.INIT_FIELD)
+        field[0][1] = 8  # Duplicate in the first row and group
+        sudoku = Sudoku(field)
+        self.assertFalse(sudoku.valid)
+
+        field = np.copy(self.INIT_FIELD)
+        field[1][0] = 5  # Duplicate in the first column only
+        sudoku = Sudoku(field)
+        self.assertFalse(sudoku.valid)
+
+    def test_str(self):
+        lines = str(Sudoku(self.INIT_FIELD)).split('\r\n')
+        self.assertEqual(10, len(lines))
+        self.assertEqual(' 8  0  0  0  1  0  6  0  9 ', lines[0])
+        self.assertEqual('', lines[-1])
+
     def test_solve(self):
         sudoku = Sudoku(self.INIT_FIELD)
         print(sudoku)
         sudoku.solve_single_position()
         self.assertTrue(sudoku.valid)
         print(sudoku)
+
+    def test_solve_without_guessing(self):
+        sudoku = Sudoku(filename=os.path.join(SUDOKU_DIR, 'expert_sudoku_com.txt'))
+        self.assertTrue(sudoku.solve_single_position())
+        self.assertTrue(sudoku.filled)
+        self.assertTrue(sudoku.valid)
+
+    def test_solve_contradiction(self):
+        field = np.zeros((9, 9))
+        field[0][:8] = range(1, 9)
+        field[1][8] = 9  # The last cell of the first row can't be filled anymore
+        sudoku = Sudoku(field)
+        self.assertFalse(sudoku.solve_single_position())
+
+    def test_solve_duplicate_givens(self):
+        field = np.zeros((9, 9))
+        field[0][0] = field[0][4] = 1  # The first row already contains two ones
+        sudoku = Sudoku(field)
+        self.assertFalse(sudoku.solve_single_position())
+
+    def test_solve_after_direct_write(self):
+        sudoku = Sudoku(filename=os.path.join(SUDOKU_DIR, 'evil_sudoku_com.txt'))
+        sudoku.field[0][1] = 5  # Part of the solution, written without going through the solver
+        sudoku.solve()
+        self.assertTrue(sudoku.filled)
+        self.assertTrue(sudoku.valid)
+
+    def test_solve_unsolvable_restores_field(self):
+        sudoku = Sudoku([
+            [0, 0, 3, 0, 0, 0, 0, 0, 9],
+            [0, 5, 6, 7, 8, 0, 0, 0, 3],
+            [1, 0, 0, 0, 0, 0, 4, 5, 0],
+            [0, 0, 0, 5, 0, 7, 0, 9, 1],
+            [0, 6, 0, 0, 9, 0, 0, 0, 0],
+            [8, 0, 0, 2, 3, 0, 5, 0, 0],
+            [3, 0, 0, 6, 0, 0, 0, 1, 0],
+            [0, 7, 0, 0, 0, 2, 0, 0, 5],
+            [0, 0, 2, 0, 0, 0, 0, 7, 8]
+        ])
+        self.assertTrue(sudoku.solve_single_position())
+        propagated = np.copy(sudoku.field)
+
+        # Only guessing finds out there is no solution, after which every guess has to be undone again
+        sudoku.solve()
+        self.assertFalse(sudoku.filled)
+        np.testing.assert_array_equal(propagated, sudoku.field)
+        for mask, expected in zip((sudoku._row_used, sudoku._col_used, sudoku._box_used), used_masks(propagated)):
+            np.testing.assert_array_equal(expected, mask)
+
+    def test_solve_guessing(self):
+        for filename in ['expert_sudoku_com.txt', 'evil_sudoku_com.txt']:
+            sudoku = Sudoku(filename=os.path.join(SUDOKU_DIR, filename))
+            initial = np.copy(sudoku.field)
+            sudoku.solve()
+            self.assertTrue(sudoku.filled)
+            self.assertTrue(sudoku.valid)
+            np.testing.assert_array_equal(initial[initial != 0], sudoku.field[initial != 0])
+
+    def test_solve_many(self):
+        fields = [Sudoku(filename=os.path.join(SUDOKU_DIR, filename)).field
+                  for filename in ['expert_sudoku_com.txt', 'evil_sudoku_com.txt']]
+        solved = solve_many(fields, processes=2)
+        self.assertEqual((2, 9, 9), solved.shape)
+        for field, solution in zip(fields, solved):
+            sudoku = Sudoku(field)
+            sudoku.solve()
+            np.testing.assert_array_equal(sudoku.field, solution)